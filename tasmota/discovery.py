@@ -1,17 +1,51 @@
-import json
+import functools
 import logging
+from collections import OrderedDict
+
+try:
+    import orjson as _json
+except ImportError:  # pragma: no cover
+    import json as _json
 
 
 log = logging.getLogger(__name__)
 
+_DISCOVERY_PREFIX = 'tasmota/discovery/'
+_TELE_PREFIX = 'tele/'
+
+# Only last will (LWT) telemetry is kept; it is all Device.online reads
+_TELEMETRY_SUFFIX = '/LWT'
+# Upper bound on retained telemetry topics; the oldest are dropped first
+_TELEMETRY_MAX = 10000
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_topic(topic: str) -> tuple[str, str] | None:
+    '''
+    Parse "tasmota/discovery/<sn>/<type>" into (sn, lowercased type).
+    Returns None for any other topic.
+    '''
+    parts = topic.split('/')
+    if len(parts) != 4 or parts[1] != 'discovery':
+        return None
+    return parts[2], parts[3].lower()
+
 
 class Device:
+    __slots__ = (
+        'sn', '_mqtt_client', '_telemetry', '_config', '_sensors',
+        '_lwt_topic', '_online_message_bytes', 'on_change', '__weakref__',
+    )
+
     def __init__(self, sn, client, telemetry):
         self.sn = sn
         self._mqtt_client = client
         self._telemetry = telemetry
         self._config = {}
         self._sensors = {}
+        # Derived from the config, see the config setter
+        self._lwt_topic = None
+        self._online_message_bytes = b'Online'
 
         self.on_change = None
 
@@ -22,8 +56,11 @@ class Device:
     @config.setter
     def config(self, value):
         self._config = value
-        if self.on_change is not None:
-            self.on_change(self)
+        self._lwt_topic = f'tele/{value.get("t")}/LWT'
+        self._online_message_bytes = self.online_message.encode()
+        on_change = self.on_change
+        if on_change is not None:
+            on_change(self)
 
     @property
     def sensors(self):
@@ -32,8 +69,9 @@ class Device:
     @sensors.setter
     def sensors(self, value):
         self._sensors = value
-        if self.on_change is not None:
-            self.on_change(self)
+        on_change = self.on_change
+        if on_change is not None:
+            on_change(self)
 
     @property
     def ip_address(self):
@@ -49,24 +87,30 @@ class Device:
 
     @property
     def online(self):
-        topic = f'tele/{self.topic}/LWT'
-        message = self._telemetry.get(topic)
-        if message is None or self.online_message is None:
+        message = self._telemetry.get(self._lwt_topic)
+        if message is None:
             return None
 
-        return message == self.online_message
+        return message == self._online_message_bytes
 
 
 class Discover:
     def __init__(self, mqtt_client):
         self.client = mqtt_client
         self.devices = {}
-        self._telemetry = {}
+        # Raw payload bytes keyed by topic, decoded only when read
+        self._telemetry = OrderedDict()
 
         self._other_on_connect = mqtt_client.on_connect
         self._other_on_message = mqtt_client.on_message
         self._new_device_callbacks = []
 
+        # Without callbacks to chain to, install the variants that skip them
+        if not self._other_on_connect:
+            self._on_connect = self._on_connect_no_chain
+        if not self._other_on_message:
+            self._on_message = self._on_message_no_chain
+
         mqtt_client.on_connect = self._on_connect
         mqtt_client.on_message = self._on_message
 
@@ -79,34 +123,48 @@ class Discover:
         if value not in self._new_device_callbacks:
             self._new_device_callbacks.append(value)
 
+    @property
+    def online_devices(self) -> list[Device]:
+        '''Devices whose last will message reports them as online'''
+        return [device for device in self.devices.values() if device.online]
+
+    @property
+    def online_count(self) -> int:
+        '''Number of devices reported as online'''
+        return len(self.online_devices)
+
     def _discovery_msg(self, msg):
-        try:
-            _, _, sn, msg_type = msg.topic.split('/')
-        except ValueError:
+        parsed = _parse_topic(msg.topic)
+        if parsed is None:
             log.debug(f'_discovery_msg unknown format for {msg.topic}')
             return
+        sn, msg_type = parsed
 
         device = self.devices.get(sn)
         if not device:
             device = Device(sn, self.client, self._telemetry)
             self.devices[sn] = device
             log.info(f'discovered new device "{sn}"')
-            for fn in self._new_device_callbacks:
+            # Snapshot, so callbacks may (un)register callbacks safely
+            for fn in tuple(self._new_device_callbacks):
                 fn(device)
 
-        if msg_type.lower() == 'config':
+        if msg_type == 'config':
             try:
-                config = json.loads(msg.payload)
+                config = _json.loads(msg.payload)
             except Exception:
                 log.debug(f'_discovery_msg bad format for {msg.payload}')
                 return
+            if not isinstance(config, dict):
+                log.debug(f'_discovery_msg bad format for {msg.payload}')
+                return
 
             device.config = config
             log.debug(f'updated config for {sn}')
 
-        elif msg_type.lower() == 'sensors':
+        elif msg_type == 'sensors':
             try:
-                sensors = json.loads(msg.payload)
+                sensors = _json.loads(msg.payload)
             except Exception:
                 # bad payload
                 return
@@ -115,19 +173,37 @@ class Discover:
             device.sensors = sensors.get('sn', {})
 
     def _telemetry_msg(self, msg):
-        self._telemetry[msg.topic] = msg.payload.decode()
-
-    def _on_connect(self, *args, **kwargs):
-        if self._other_on_connect:
-            self._other_on_connect(*args, **kwargs)
+        topic = msg.topic
+        if not topic.endswith(_TELEMETRY_SUFFIX):
+            return
 
-    def _on_message(self, client, userdata, msg):
-        if msg.topic.startswith('tasmota/discovery/'):
-            log.debug(f'received discovery message')
-            self._discovery_msg(msg)
-        elif msg.topic.startswith('tele/'):
+        telemetry = self._telemetry
+        telemetry[topic] = msg.payload
+        telemetry.move_to_end(topic)
+        if len(telemetry) > _TELEMETRY_MAX:
+            telemetry.popitem(last=False)
+
+    def _on_connect_no_chain(self, client, *args, **kwargs):
+        # Only LWT telemetry is retained, so don't ask the broker for more
+        client.subscribe([
+            (_DISCOVERY_PREFIX + '#', 0),
+            (_TELE_PREFIX + '+' + _TELEMETRY_SUFFIX, 0),
+        ])
+
+    def _on_connect(self, client, *args, **kwargs):
+        self._on_connect_no_chain(client, *args, **kwargs)
+        self._other_on_connect(client, *args, **kwargs)
+
+    def _on_message_no_chain(self, client, userdata, msg):
+        # Telemetry is far more frequent than discovery, so check it first
+        topic = msg.topic
+        if topic.startswith(_TELE_PREFIX):
             log.debug(f'received telemetry message')
             self._telemetry_msg(msg)
+        elif topic.startswith(_DISCOVERY_PREFIX):
+            log.debug(f'received discovery message')
+            self._discovery_msg(msg)
 
-        if self._other_on_message:
-            self._other_on_message(client, userdata, msg)
+    def _on_message(self, client, userdata, msg):
+        self._on_message_no_chain(client, userdata, msg)
+        self._other_on_message(client, userdata, msg)
@@ -23,16 +23,39 @@ class Color:
     step_next = '+'
     step_previous = '-'
 
+    # Instances are immutable, so the string form is computed once
+    __slots__ = ('_values', '_str')
+
     def __init__(self, red, green, blue, cool=None, warm=None):
-        self._values = (red, green, blue, cool, warm)
-        for value in self._values:
+        values = (red, green, blue, cool, warm)
+        for value in values:
             if value is not None:
                 assert 0 <= value <= 255
 
+        hex_values = ['==' if val is None else f'{val:02x}' for val in values]
+        object.__setattr__(self, '_values', values)
+        object.__setattr__(self, '_str', '#' + ''.join(hex_values))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __reduce__(self):
+        # Rebuild through __init__ so copy and pickle never set attributes
+        return (type(self), self._values)
+
+    def __eq__(self, other):
+        if not isinstance(other, Color):
+            return NotImplemented
+        return self._values == other._values
+
+    def __hash__(self):
+        return hash(self._values)
+
     def __str__(self):
-        values = ['==' if val is None else f'00{hex(val)[2:]}'[-2:]
-                  for val in self._values]
-        return f'#{"".join(values)}'
+        return self._str
 
 
 class ColorTemp:
@@ -53,6 +76,8 @@ class Effect:
 
 
 class LightCommand(Command):
+    __slots__ = ()
+
     def color(self, value: str, keep_dim=False):
         '''
         <value>
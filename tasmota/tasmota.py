@@ -1,14 +1,37 @@
 # Basic control of a Tasmota device
 
+import functools
 import logging
 
 import requests
 
+try:
+    import orjson as _json
+except ImportError:  # pragma: no cover
+    import json as _json
+
 
 log = logging.getLogger(__name__)
 
+# LWT payloads mapped to the online state
+_LWT_MAP = {'online': True, 'offline': False}
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_topic(topic: str) -> tuple[str, str] | None:
+    '''
+    Parse "stat/<topic>/<command>" into (topic, command).
+    Returns None for any other topic.
+    '''
+    parts = topic.split('/')
+    if len(parts) != 3 or parts[0] != 'stat':
+        return None
+    return parts[1], parts[2]
+
 
 class Command:
+    __slots__ = ('_parent', '_commands', '__weakref__')
+
     def __init__(self, parent: 'Tasmota', stack=False):
         self._parent = parent
 
@@ -51,14 +74,32 @@ class Command:
         str_state = 'on' if state else 'off'
         return self._go(f'Power {str_state}')
 
+    def power_on(self):
+        return self._go('Power on')
+
+    def power_off(self):
+        return self._go('Power off')
+
     def power1(self, state: bool):
         str_state = 'on' if state else 'off'
         return self._go(f'Power1 {str_state}')
 
+    def power1_on(self):
+        return self._go('Power1 on')
+
+    def power1_off(self):
+        return self._go('Power1 off')
+
     def power2(self, state: bool):
         str_state = 'on' if state else 'off'
         return self._go(f'Power2 {str_state}')
 
+    def power2_on(self):
+        return self._go('Power2 on')
+
+    def power2_off(self):
+        return self._go('Power2 off')
+
     # ### Management ### #
 
     def delay(self, time: int):
@@ -86,16 +127,21 @@ class Tasmota:
         user: str = None,
         password: str = None,
         topic: str = None,
-        mqtt_client=None
+        mqtt_client=None,
+        timeout: float = None
     ):
         self.ip_address = ip_address
         self.user = user
         self.password = password
+        self.timeout = timeout
+
+        # Reuse the HTTP connection between commands
+        self._session = requests.Session()
 
         self._change_listeners = {}
 
-        self.topic = topic
         self._mqtt_client = None
+        self.topic = topic
         self._set_mqtt_client(mqtt_client)
 
         if not self.mqtt_client and not ip_address:
@@ -111,6 +157,23 @@ class Tasmota:
     def online(self):
         return self._online
 
+    @property
+    def topic(self):
+        return self._topic
+
+    @topic.setter
+    def topic(self, value):
+        client = self._mqtt_client
+        if client:
+            self._unregister_mqtt_client(client)
+
+        self._topic = value
+        # Precomputed for _send_mqtt
+        self._cmnd_prefix = f'cmnd/{value}/'
+
+        if client:
+            self._register_mqtt_client(client)
+
     @property
     def mqtt_client(self):
         return self._mqtt_client
@@ -121,44 +184,58 @@ class Tasmota:
 
     def _set_mqtt_client(self, client):
         if self._mqtt_client != client and self._mqtt_client:
-            # de-register from old client
-            try:
-                del self._mqtt_client._userdata[self]
-            except KeyError:
-                pass
+            self._unregister_mqtt_client(self._mqtt_client)
 
         self._mqtt_client = client
         if not client:
             # If it was set to None, perform no more actions
             return
 
-        # Use the client userdata to store a ref to this object
-        if not client._userdata:
+        self._register_mqtt_client(client)
+
+    def _register_mqtt_client(self, client):
+        # Use the client userdata to store a ref to this object. The dict
+        # marks the client as set up; it may be empty after a topic change,
+        # and the handlers (perhaps since wrapped by Discover) must stay put.
+        if client._userdata is None:
             client.user_data_set({})
             self._setup_mqtt_client(client)
         client._userdata[self.topic] = self
+        # Have paho route this device's status messages straight here.
+        # paho skips on_message for these, so chained handlers (such as one
+        # wrapped by Discover) no longer see "stat/<topic>/..." messages.
+        client.message_callback_add(f'stat/{self.topic}/+', self._mqtt_on_stat)
+
+    def _unregister_mqtt_client(self, client):
+        client.message_callback_remove(f'stat/{self.topic}/+')
+        if client._userdata and client._userdata.get(self.topic) is self:
+            del client._userdata[self.topic]
 
     @classmethod
     def _mqtt_on_connect(cls, client, userdata, flags, rc):
-        # subscribe to all channels
-        log.info('MQTT Connected. Listening for any changes')
-        client.subscribe('#')
+        # subscribe to the status channels of all devices
+        log.info('MQTT Connected. Listening for status changes')
+        client.subscribe('stat/+/+')
 
     @classmethod
     def _mqtt_on_message(cls, client, userdata, msg):
         # All status messages start with "stat/"
         # topic="stat/tasmota_197CD7/POWER1" payload="ON"
 
-        log.debug(f'MQTT Received {msg.topic} :: {msg.payload}')
+        if not msg:
+            return
+
+        topic, payload = msg.topic, msg.payload
+        log.debug(f'MQTT Received {topic} :: {payload}')
 
-        if not msg or not msg.topic or not msg.topic.startswith('stat/'):
+        if not topic:
             return
 
-        try:
-            prefix, topic, command = msg.topic.split('/')
-        except ValueError:
-            # If we don't have the expected count of values
+        parsed = _parse_topic(topic)
+        if parsed is None:
+            # Not a status message, or not the expected count of values
             return
+        topic, command = parsed
 
         if not userdata:
             return
@@ -168,7 +245,21 @@ class Tasmota:
             return
 
         # Invoke the callback functions
-        instance._on_change(client, command, msg.payload.decode())
+        instance._on_change(client, command, payload.decode())
+
+    def _mqtt_on_stat(self, client, userdata, msg):
+        '''
+        Handle a "stat/<topic>/<command>" message for this device.
+        '''
+        topic, payload = msg.topic, msg.payload
+        log.debug(f'MQTT Received {topic} :: {payload}')
+
+        parsed = _parse_topic(topic)
+        if parsed is None:
+            return
+        _, command = parsed
+
+        self._on_change(client, command, payload.decode())
 
     def _on_change(self, client, command, payload):
         '''
@@ -177,10 +268,7 @@ class Tasmota:
         log.debug(f'_on_change event for {self.topic} :: {command}')
 
         if command == 'LWT':
-            if payload.lower() == 'online':
-                self._online = True
-            elif payload.lower() == 'offline':
-                self._online = False
+            self._online = _LWT_MAP.get(payload.lower(), self._online)
 
         # Call the change listener if set
         change_listener = self._change_listeners.get(command)
@@ -233,17 +321,26 @@ class Tasmota:
 
         log.info(f'HTTP Sending {url} :: {params}')
 
-        response = requests.get(url, params=params)
+        response = self._session.get(url, params=params, timeout=self.timeout)
         response.raise_for_status()
 
-        return response.json()
+        try:
+            return _json.loads(response.content)
+        except ValueError as e:
+            # Match the exception response.json() raises. The stdlib json
+            # raises UnicodeDecodeError, without msg/doc/pos, on bad bytes.
+            raise requests.exceptions.JSONDecodeError(
+                getattr(e, 'msg', str(e)),
+                getattr(e, 'doc', response.text),
+                getattr(e, 'pos', 0),
+                response=response) from e
 
     def _send_mqtt(self, command: str) -> dict:
-        cmd, payload = command.split(' ', maxsplit=1)
-        cmd = cmd.upper()
-        topic = f'cmnd/{self.topic}/{cmd}'
-        log.info(f'MQTT Sending {topic} :: {cmd}')
-        self.mqtt_client.publish(topic, payload=payload)
+        cmd, _, payload = command.partition(' ')
+        topic = self._cmnd_prefix + cmd.upper()
+        log.info(f'MQTT Sending {topic} :: {payload}')
+        # Commands are fire-and-forget; QoS 0 skips the PUBACK round trip
+        self.mqtt_client.publish(topic, payload=payload, qos=0, retain=False)
         return {}
 
     def send(self, command: str | list[str]) -> dict:
@@ -265,10 +362,8 @@ class Tasmota:
         Set zero to true to execute "without any delay"
           Faster execution, and seems to ignore any "delay" commands
         '''
-        zero_flag = '0' if zero else ''
-
-        command = f'Backlog{zero_flag} {"; ".join(commands)}'
-        return self.send(command)
+        prefix = 'Backlog0 ' if zero else 'Backlog '
+        return self.send(prefix + '; '.join(commands))
 
     @property
     def command_runner(self):
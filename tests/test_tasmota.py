@@ -0,0 +1,54 @@
+import json
+import unittest
+from unittest import mock
+
+try:
+    import requests
+except ImportError:  # pragma: no cover
+    requests = None
+
+
+class FakeResponse:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def raise_for_status(self):
+        pass
+
+
+@unittest.skipIf(requests is None, 'requests is not installed')
+class SendHttpJsonTest(unittest.TestCase):
+    '''_send_http with the stdlib json fallback (orjson not installed)'''
+
+    def setUp(self):
+        from tasmota import tasmota
+        patcher = mock.patch.object(tasmota, '_json', json)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.device = tasmota.Tasmota(ip_address='192.0.2.1')
+
+    def send(self, content: bytes):
+        self.device._session = mock.Mock()
+        self.device._session.get.return_value = FakeResponse(content)
+        return self.device._send_http('State')
+
+    def test_json_body(self):
+        self.assertEqual(self.send(b'{"POWER": "ON"}'), {'POWER': 'ON'})
+
+    def test_non_json_body(self):
+        with self.assertRaises(requests.exceptions.JSONDecodeError):
+            self.send(b'<html>captive portal</html>')
+
+    def test_non_utf8_body(self):
+        for content in (b'\x80abc', b'\xff\xfe\x00'):
+            with self.subTest(content=content):
+                with self.assertRaises(requests.exceptions.JSONDecodeError):
+                    self.send(content)
+
+
+if __name__ == '__main__':
+    unittest.main()